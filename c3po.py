@@ -1,21 +1,39 @@
 import os
+import sys
+import time
 import logging
 import base64
 import pika
 from dotenv import load_dotenv
 from openai import OpenAI
+from PIL import Image, ImageOps, ImageStat
+
+try:
+    import pytesseract
+except ImportError:  # optional: local OCR stage
+    pytesseract = None
 
 from consts import RABBITMQ_URI, QUEUE_FALCON_DESCRIBE, QUEUE_FALCON_ASK
+from falcon_logging import setup_logging
 
 APP_NAME = "c3po.py"
 __version__ = "1.0"
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format=f'%(asctime)s | {APP_NAME} | %(levelname)s | %(message)s'
-)
+logger = logging.getLogger(APP_NAME)
+
+# === Local OCR (optional) ===
+# When enabled and confident enough, the text read from the screenshot is sent
+# straight to yoda instead of asking GPT-4o vision to describe the image.
+OCR_ENABLED = os.getenv("FALCON_OCR_ENABLED", "false").lower() in ("1", "true", "yes")
+OCR_LANG = os.getenv("FALCON_OCR_LANG", "eng")
+OCR_MIN_CONFIDENCE = float(os.getenv("FALCON_OCR_MIN_CONFIDENCE", "80"))
+OCR_MIN_WORDS = int(os.getenv("FALCON_OCR_MIN_WORDS", "5"))
+
+# GPT-4o pricing in USD per 1M tokens, used by --compare.
+VISION_INPUT_PRICE = 2.50
+VISION_OUTPUT_PRICE = 10.00
 
 BANNER = r"""
 
@@ -31,43 +49,128 @@ BANNER = r"""
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
-def describe_image(file_path):
+def _overlaps(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def extract_text(file_path):
+    """Read the text of a screenshot with tesseract, keeping line breaks and indentation.
+
+    Returns (text, mean word confidence 0-100, word count) or None when OCR is unavailable.
+    """
+    if pytesseract is None:
+        return None
     try:
-        logging.info(f"{APP_NAME}: Describing image from path: {file_path}")
-        with open(file_path, "rb") as img_file:
-            image_base64 = base64.b64encode(img_file.read()).decode("utf-8")
-
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": "Describe the contents of this screenshot in detail."},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{image_base64}"
-                            }
+        image = ImageOps.grayscale(Image.open(file_path))
+        # Dark editor themes: tesseract reads dark text on a light background best.
+        if ImageStat.Stat(image).mean[0] < 128:
+            image = ImageOps.invert(image)
+
+        data = pytesseract.image_to_data(image, lang=OCR_LANG, output_type=pytesseract.Output.DICT)
+    except Exception as e:
+        logger.warning("Local OCR failed, falling back to vision: %s", e)
+        return None
+
+    # Tesseract already splits columns (e.g. problem text | editor) into
+    # separate blocks; lay out each block on its own so they never interleave.
+    blocks = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not word.strip():
+            continue
+        lines = blocks.setdefault(data["block_num"][i], {})
+        key = (data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append((data["left"][i], data["top"][i], data["width"][i], word))
+        confidences.append(conf)
+
+    if not confidences:
+        return "", 0.0, 0
+
+    # Margin and character width come from the blocks sharing the same column,
+    # so a code editor split into several blocks keeps its relative indentation.
+    # Blocks spanning several columns (a title, a toolbar row) are left out of
+    # the narrower columns they cover.
+    extents = {
+        block_num: (min(left for words in lines.values() for left, *_ in words),
+                    max(left + width for words in lines.values() for left, _, width, _ in words))
+        for block_num, lines in blocks.items()
+    }
+
+    text_blocks = []
+    anchors = {}
+    for block_num in sorted(blocks):
+        overlapping = [other for other in extents if _overlaps(extents[other], extents[block_num])]
+        column = tuple(sorted(
+            other for other in overlapping
+            if not any(_overlaps(extents[other], extents[outside]) for outside in extents
+                       if outside not in overlapping)
+        ))
+        column_lines = [sorted(words) for other in column for words in blocks[other].values()]
+        # Character pitch from word start to next word start (box widths miss the side bearings).
+        pitches = sorted((nxt[0] - cur[0]) / (len(cur[3]) + 1)
+                         for words in column_lines for cur, nxt in zip(words, words[1:]))
+        pitches = pitches or sorted(width / len(word) for words in column_lines for _, _, width, word in words)
+        char_width = pitches[len(pitches) // 2] or 1
+        margin = min(extents[other][0] for other in column)
+
+        lines = [sorted(words) for words in blocks[block_num].values()]
+        lines.sort(key=lambda words: (words[0][1], words[0][0]))
+        column_anchors = anchors.setdefault(column, [])
+        text_lines = []
+        for words in lines:
+            # Glyph boxes start a few pixels apart; snap to an indent already seen.
+            start = next((a for a in column_anchors if abs(a - words[0][0]) < char_width * 0.6), words[0][0])
+            if start == words[0][0]:
+                column_anchors.append(start)
+            indent = " " * round((start - margin) / char_width)
+            text_lines.append(indent + " ".join(word for *_, word in words))
+        text_blocks.append("\n".join(text_lines))
+
+    return "\n\n".join(text_blocks), sum(confidences) / len(confidences), len(confidences)
+
+
+def _vision_request(file_path):
+    with open(file_path, "rb") as img_file:
+        image_base64 = base64.b64encode(img_file.read()).decode("utf-8")
+
+    return client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "Describe the contents of this screenshot in detail."},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/png;base64,{image_base64}"
                         }
-                    ]
-                }
-            ],
-            max_tokens=500
-        )
+                    }
+                ]
+            }
+        ],
+        max_tokens=500
+    )
+
+
+def describe_image(file_path):
+    try:
+        logger.info("Describing image from path: %s", file_path)
+        response = _vision_request(file_path)
 
         description = response.choices[0].message.content
-        logging.info(f"{APP_NAME}: Image description successfully generated.")
+        logger.info("Image description successfully generated.")
         return description
 
     except Exception as e:
-        logging.error(f"{APP_NAME}: Error while describing image: {e}")
+        logger.error("Error while describing image: %s", e)
         return None
 
 
-def send_to_queue(queue_name, message):
+def send_to_queue(queue_name, message, correlation_id=None):
     try:
-        logging.info(f"{APP_NAME}: Connecting to RabbitMQ to send message to queue: {queue_name}")
+        logger.info("Connecting to RabbitMQ to send message to queue: %s", queue_name)
         params = pika.URLParameters(RABBITMQ_URI)
         connection = pika.BlockingConnection(params)
         channel = connection.channel()
@@ -76,39 +179,58 @@ def send_to_queue(queue_name, message):
             exchange='',
             routing_key=queue_name,
             body=message.encode(),
-            properties=pika.BasicProperties(delivery_mode=2)
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                app_id=APP_NAME,
+                correlation_id=correlation_id
+            )
         )
         connection.close()
-        logging.info(f"{APP_NAME}: Message successfully sent to queue: {queue_name}")
+        logger.info("Message successfully sent to queue: %s", queue_name)
     except Exception as e:
-        logging.error(f"{APP_NAME}: Failed to send message to queue '{queue_name}': {e}")
+        logger.error("Failed to send message to queue '%s': %s", queue_name, e)
 
 
 def on_message(ch, method, properties, body):
     file_path = body.decode()
-    logging.info(f"{APP_NAME}: Received message with image path: {file_path}")
+    logger.info("Received message with image path: %s", file_path)
 
     if not os.path.exists(file_path):
-        logging.warning(f"{APP_NAME}: File not found at path: {file_path}")
+        logger.warning("File not found at path: %s", file_path)
+        return
+
+    prompt = None
+    if OCR_ENABLED:
+        ocr = extract_text(file_path)
+        if ocr and ocr[1] >= OCR_MIN_CONFIDENCE and ocr[2] >= OCR_MIN_WORDS:
+            logger.info("Using local OCR text (confidence %.1f, %d words)", ocr[1], ocr[2])
+            prompt = ocr[0]
+        elif ocr:
+            logger.info("OCR confidence too low (%.1f, %d words), using vision", ocr[1], ocr[2])
+
+    if prompt:
+        logger.info("OCR text ready", extra={"text": prompt})
+        send_to_queue(QUEUE_FALCON_ASK, prompt, properties.correlation_id)
         return
 
     description = describe_image(file_path)
     if description:
-        print(f"\n📝 Description:\n{description}\n")
-        send_to_queue(QUEUE_FALCON_ASK, description)
+        logger.info("Description ready", extra={"description": description})
+        send_to_queue(QUEUE_FALCON_ASK, description, properties.correlation_id)
     else:
-        logging.warning(f"{APP_NAME}: No description was generated from the image.")
+        logger.warning("No description was generated from the image.")
 
 
 def listen_for_commands():
+    setup_logging(APP_NAME)
     print(BANNER)
 
     if not RABBITMQ_URI:
-        logging.critical(f"{APP_NAME}: Environment variable RABBITMQ_URI is not set. Exiting.")
+        logger.critical("Environment variable RABBITMQ_URI is not set. Exiting.")
         return
 
-    logging.info(f"{APP_NAME}: C-3PO Agent is now online.")
-    logging.info(f"{APP_NAME}: Awaiting image paths for processing...")
+    logger.info("C-3PO Agent is now online.")
+    logger.info("Awaiting image paths for processing...")
 
     try:
         params = pika.URLParameters(RABBITMQ_URI)
@@ -122,8 +244,40 @@ def listen_for_commands():
         )
         channel.start_consuming()
     except Exception as e:
-        logging.error(f"{APP_NAME}: Error starting message listener: {e}")
+        logger.error("Error starting message listener: %s", e)
+
+
+def compare_paths(image_paths):
+    """Print latency and API cost of the OCR path vs the vision path for each image."""
+    print(f"{'image':<30} {'ocr s':>7} {'conf':>6} {'words':>6} {'vision s':>9} {'vision $':>9}")
+    for path in image_paths:
+        start = time.perf_counter()
+        ocr = extract_text(path)
+        ocr_seconds = time.perf_counter() - start
+        if ocr:
+            ocr_cols = f"{ocr_seconds:>7.2f} {ocr[1]:>6.1f} {ocr[2]:>6}"
+        else:
+            ocr_cols = f"{'n/a':>7} {'n/a':>6} {'n/a':>6}"
+
+        try:
+            start = time.perf_counter()
+            usage = _vision_request(path).usage
+            vision_seconds = time.perf_counter() - start
+            cost = (usage.prompt_tokens * VISION_INPUT_PRICE
+                    + usage.completion_tokens * VISION_OUTPUT_PRICE) / 1_000_000
+            vision_cols = f"{vision_seconds:>9.2f} {cost:>9.5f}"
+        except Exception as e:
+            logger.error("Vision request failed for %s: %s", path, e)
+            vision_cols = f"{'n/a':>9} {'n/a':>9}"
+
+        print(f"{os.path.basename(path)[:30]:<30} {ocr_cols} {vision_cols}")
 
 
 if __name__ == '__main__':
-    listen_for_commands()
+    if len(sys.argv) > 1 and sys.argv[1] == "--compare":
+        if len(sys.argv) == 2:
+            sys.exit("usage: python3 c3po.py --compare <image> [<image> ...]")
+        setup_logging(APP_NAME)
+        compare_paths(sys.argv[2:])
+    else:
+        listen_for_commands()
@@ -0,0 +1,164 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+__version__ = "1.0"
+
+# === Environment ===
+# FALCON_LOG_LEVEL            -> default level for every agent (INFO)
+# FALCON_LOG_LEVEL_<AGENT>    -> per-agent override, e.g. FALCON_LOG_LEVEL_YODA=DEBUG
+# FALCON_LOG_MAX_FIELD        -> max chars kept from payload fields (prompts, descriptions...)
+# FALCON_LOG_MAX_MESSAGE      -> max chars kept from the formatted message itself
+DEFAULT_LEVEL = "INFO"
+MAX_FIELD_LENGTH = int(os.getenv("FALCON_LOG_MAX_FIELD", "200"))
+MAX_MESSAGE_LENGTH = int(os.getenv("FALCON_LOG_MAX_MESSAGE", "1000"))
+# Level for third-party loggers (pika, httpx, openai...): their DEBUG records
+# carry whole request bodies, including base64 screenshots.
+THIRD_PARTY_LEVEL = logging.WARNING
+
+# Process-wide side effect of setup_logging(): logging.logThreads,
+# logProcesses and logMultiprocessing are turned off, so no LogRecord in the
+# process (ours or any library's) carries thread/process names. None of them
+# end up in the JSON line and collecting them costs time on every call.
+
+# Attributes every LogRecord has; anything else was passed through `extra=`.
+_RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_listener_pid = None
+
+
+def truncate(value, limit: int = MAX_FIELD_LENGTH):
+    """Cut long strings so a full prompt never ends up in a log line."""
+    if not isinstance(value, str) or limit <= 0 or len(value) <= limit:
+        return value
+    return f"{value[:limit]}... [+{len(value) - limit} chars]"
+
+
+def agent_level(app_name: str) -> int:
+    """Resolve the log level for an agent from FALCON_LOG_LEVEL_<AGENT> or FALCON_LOG_LEVEL."""
+    agent = os.path.splitext(app_name)[0].upper()
+    name = os.getenv(f"FALCON_LOG_LEVEL_{agent}") or os.getenv("FALCON_LOG_LEVEL") or DEFAULT_LEVEL
+    level = logging.getLevelName(name.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; the message and `extra=` fields are truncated before being written."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                  + f".{int(record.msecs):03d}",
+            "app": record.name,
+            "level": record.levelname,
+            "msg": truncate(record.getMessage(), MAX_MESSAGE_LENGTH),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = truncate(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _AsyncQueueHandler(logging.handlers.QueueHandler):
+    """Hands the raw record to the listener thread.
+
+    The stock QueueHandler formats the message in `prepare()`, which would put
+    the formatting cost back on the consumer thread. Records stay in-process,
+    so they can be passed as-is and formatted by the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(app_name: str, stream=None) -> logging.Logger:
+    """Configure non-blocking JSON logging for the current process.
+
+    Records go through an unbounded queue and are formatted and written by a
+    background thread. Only the agent's own logger follows the per-agent
+    level; everything else stays at WARNING. Safe to call more than once; it
+    is re-run after a fork (start.py) since the listener thread does not
+    survive it.
+    """
+    global _listener, _listener_pid
+
+    logger = logging.getLogger(app_name)
+    logger.setLevel(agent_level(app_name))
+
+    if _listener_pid == os.getpid():
+        return logger
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    # See the note at the top of the module.
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_AsyncQueueHandler(log_queue))
+    root.setLevel(THIRD_PARTY_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_logging)
+    return logger
+
+
+def stop_logging() -> None:
+    """Flush pending records and stop the listener thread."""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+    _listener = None
+    _listener_pid = None
+
+
+def _measure(log_call, iterations: int) -> float:
+    payload = "x" * 5000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        log_call(payload)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def benchmark(iterations: int = 20000) -> None:
+    """Compare per-call cost on the calling thread: old basicConfig vs queue handler."""
+    with open(os.devnull, "w") as devnull:
+        sync_logger = logging.getLogger("bench.sync")
+        sync_logger.propagate = False
+        sync_handler = logging.StreamHandler(devnull)
+        sync_handler.setFormatter(logging.Formatter("%(asctime)s | bench | %(levelname)s | %(message)s"))
+        sync_logger.addHandler(sync_handler)
+        sync_logger.setLevel(logging.INFO)
+        sync_us = _measure(lambda p: sync_logger.info(f"bench: Received prompt: {p}"), iterations)
+
+        async_logger = setup_logging("bench.async", stream=devnull)
+        async_logger.setLevel(logging.INFO)
+        async_us = _measure(lambda p: async_logger.info("Received prompt", extra={"prompt": p}), iterations)
+
+        async_logger.setLevel(logging.WARNING)
+        disabled_us = _measure(lambda p: async_logger.info("Received prompt", extra={"prompt": p}), iterations)
+
+        stop_logging()
+
+    print(f"sync stream handler : {sync_us:6.2f} us/call")
+    print(f"async queue handler : {async_us:6.2f} us/call")
+    print(f"level disabled      : {disabled_us:6.2f} us/call")
+
+
+if __name__ == '__main__':
+    benchmark()
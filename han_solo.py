@@ -7,15 +7,12 @@ from consts import (
     QUEUE_FALCON_AUDIO,
     RABBITMQ_URI, PRINT_SCREEN, QUEUE_FALCON_SCREEN, START_RECORD, STOP_RECORD
 )
+from falcon_logging import setup_logging
 
 APP_NAME = "han_solo.py"
 __version__ = "1.0"
 
-# Logging Configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format=f'%(asctime)s | {APP_NAME} | %(levelname)s | %(message)s'
-)
+logger = logging.getLogger(APP_NAME)
 
 # ASCII Banner
 BANNER = r"""
@@ -54,16 +51,16 @@ TRIGGER_COOLDOWN = 1.0  # seconds
 def send_message(queue_name: str, message: str) -> None:
     """Send a message to a specific RabbitMQ queue."""
     try:
-        logging.info(f"Connecting to RabbitMQ to send message to queue: {queue_name}")
+        logger.info("Connecting to RabbitMQ to send message to queue: %s", queue_name)
         params = pika.URLParameters(RABBITMQ_URI)
         connection = pika.BlockingConnection(params)
         channel = connection.channel()
         channel.queue_declare(queue=queue_name, durable=True)
         channel.basic_publish(exchange='', routing_key=queue_name, body=message)
         connection.close()
-        logging.info(f"Message successfully sent to queue '{queue_name}': {message}")
+        logger.info("Message successfully sent to queue '%s': %s", queue_name, message)
     except Exception as e:
-        logging.error(f"Failed to send message to queue '{queue_name}': {e}")
+        logger.error("Failed to send message to queue '%s': %s", queue_name, e)
 
 
 def handle_key_combinations():
@@ -78,7 +75,7 @@ def handle_key_combinations():
 
     for combo, (queue, event) in COMBO_ACTIONS.items():
         if combo.issubset(current_keys):
-            logging.info(f"Trigger detected: sending '{event}' to queue '{queue}'")
+            logger.info("Trigger detected: sending '%s' to queue '%s'", event, queue)
             send_message(queue, event)
             last_trigger_time = now
             break
@@ -94,17 +91,18 @@ def on_release(key):
 
 
 def listen_for_commands():
+    setup_logging(APP_NAME)
     print(BANNER)
-    logging.info("HanSolo Agent is online.")
-    logging.info("Listening for secure key triggers:")
-    logging.info(" - Ctrl + Alt + M => Trigger Screenshot")
-    logging.info(" - Ctrl + Alt + S => Start Audio Recording")
-    logging.info(" - Ctrl + Alt + R => Stop Audio Recording")
+    logger.info("HanSolo Agent is online.")
+    logger.info("Listening for secure key triggers:")
+    logger.info(" - Ctrl + Alt + M => Trigger Screenshot")
+    logger.info(" - Ctrl + Alt + S => Start Audio Recording")
+    logger.info(" - Ctrl + Alt + R => Stop Audio Recording")
     try:
         with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
             listener.join()
     except KeyboardInterrupt:
-        logging.info("HanSolo Agent terminated by user.")
+        logger.info("HanSolo Agent terminated by user.")
 
 
 def ghostkey():
@@ -13,14 +13,12 @@ from consts import (
     RABBITMQ_URI,
     QUEUE_FALCON_AUDIO, START_RECORD, STOP_RECORD, QUEUE_FALCON_TO_SPEECH,
 )
+from falcon_logging import setup_logging
 
 APP_NAME = "leia.py"
 __version__ = "1.0"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format=f'%(asctime)s | {APP_NAME} | %(levelname)s | %(message)s'
-)
+logger = logging.getLogger(APP_NAME)
 
 BANNER = r"""
 
@@ -41,13 +39,13 @@ samplerate = 44100  # CD-quality sample rate
 
 def audio_callback(indata, frames, time, status):
     if status:
-        logging.warning(f"Audio status: {status}")
+        logger.warning("Audio status: %s", status)
     audio_data.append(indata.copy())
 
 def start_audio_recording():
     global is_recording, audio_data, recording_thread
     if is_recording:
-        logging.info(f"{APP_NAME}: Recording is already in progress.")
+        logger.info("Recording is already in progress.")
         return
 
     is_recording = True
@@ -55,7 +53,7 @@ def start_audio_recording():
 
     def record():
         with sd.InputStream(callback=audio_callback, channels=1, samplerate=samplerate):
-            logging.info(f"{APP_NAME}: Audio recording started.")
+            logger.info("Audio recording started.")
             while is_recording:
                 sd.sleep(100)
 
@@ -65,12 +63,12 @@ def start_audio_recording():
 def stop_audio_recording_and_save():
     global is_recording, recording_thread
     if not is_recording:
-        logging.info(f"{APP_NAME}: Recording is not active.")
+        logger.info("Recording is not active.")
         return None
 
     is_recording = False
     recording_thread.join()
-    logging.info(f"{APP_NAME}: Audio recording stopped.")
+    logger.info("Audio recording stopped.")
 
     audio_np = np.concatenate(audio_data)
     wav_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.wav")
@@ -83,7 +81,7 @@ def stop_audio_recording_and_save():
         channels=1
     )
     audio_segment.export(mp3_path, format="mp3")
-    logging.info(f"{APP_NAME}: Audio saved as: {mp3_path}")
+    logger.info("Audio saved as: %s", mp3_path)
     return mp3_path
 
 def send_message(queue, message):
@@ -97,14 +95,14 @@ def send_message(queue, message):
             routing_key=queue,
             body=message.encode()
         )
-        logging.info(f"{APP_NAME}: Message sent to '{queue}': {message}")
+        logger.info("Message sent to '%s': %s", queue, message)
         connection.close()
     except Exception as e:
-        logging.error(f"{APP_NAME}: Failed to send message: {e}")
+        logger.error("Failed to send message: %s", e)
 
 def on_message(ch, method, properties, body):
     message = body.decode()
-    logging.info(f"{APP_NAME}: Received command: {message}")
+    logger.info("Received command: %s", message)
 
     if message == START_RECORD:
         start_audio_recording()
@@ -115,8 +113,9 @@ def on_message(ch, method, properties, body):
             send_message(QUEUE_FALCON_TO_SPEECH, audio_path)
 
 def listen_for_commands():
+    setup_logging(APP_NAME)
     print(BANNER)
-    logging.info(f"{APP_NAME}: Listening for audio commands...")
+    logger.info("Listening for audio commands...")
 
     try:
         params = pika.URLParameters(RABBITMQ_URI)
@@ -130,7 +129,7 @@ def listen_for_commands():
         )
         channel.start_consuming()
     except Exception as e:
-        logging.error(f"{APP_NAME}: Listener encountered an error: {e}")
+        logger.error("Listener encountered an error: %s", e)
 
 if __name__ == '__main__':
     listen_for_commands()
@@ -10,14 +10,12 @@ from consts import (
     QUEUE_FALCON_DESCRIBE,
     QUEUE_FALCON_SCREEN, PRINT_SCREEN
 )
+from falcon_logging import setup_logging
 
 APP_NAME = "luke.py"
 __version__ = "1.0"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format=f'%(asctime)s | {APP_NAME} | %(levelname)s | %(message)s'
-)
+logger = logging.getLogger(APP_NAME)
 
 BANNER = r"""
 
@@ -41,10 +39,10 @@ def send_message_with_path(file_path):
             routing_key=QUEUE_FALCON_DESCRIBE,
             body=file_path
         )
-        logging.info(f"{APP_NAME}: Screenshot path sent to queue: {file_path}")
+        logger.info("Screenshot path sent to queue: %s", file_path)
         connection.close()
     except Exception as e:
-        logging.error(f"{APP_NAME}: Error sending message to queue: {e}")
+        logger.error("Error sending message to queue: %s", e)
 
 def capture_screenshot():
     try:
@@ -52,27 +50,28 @@ def capture_screenshot():
         filename = f"{uuid.uuid4()}.png"
         file_path = os.path.join(tempfile.gettempdir(), filename)
         image.save(file_path)
-        logging.info(f"{APP_NAME}: Screenshot captured and saved to: {file_path}")
+        logger.info("Screenshot captured and saved to: %s", file_path)
         return file_path
     except Exception as e:
-        logging.error(f"{APP_NAME}: Error capturing screenshot: {e}")
+        logger.error("Error capturing screenshot: %s", e)
         return None
 
 def on_message(ch, method, properties, body):
     message = body.decode()
-    logging.info(f"{APP_NAME}: Received message: {message}")
+    logger.info("Received message: %s", message)
     if message == PRINT_SCREEN:
         screenshot_path = capture_screenshot()
         if screenshot_path:
             send_message_with_path(screenshot_path)
 
 def listen_for_commands():
+    setup_logging(APP_NAME)
     print(BANNER)
     if not RABBITMQ_URI:
-        logging.error(f"{APP_NAME}: RABBITMQ_URI is not set. Please check your configuration.")
+        logger.error("RABBITMQ_URI is not set. Please check your configuration.")
         return
-    logging.info(f"{APP_NAME}: SpideySnap agent is online.")
-    logging.info(f"{APP_NAME}: Listening for screenshot events...")
+    logger.info("SpideySnap agent is online.")
+    logger.info("Listening for screenshot events...")
     try:
         params = pika.URLParameters(RABBITMQ_URI)
         connection = pika.BlockingConnection(params)
@@ -85,7 +84,7 @@ def listen_for_commands():
         )
         channel.start_consuming()
     except Exception as e:
-        logging.error(f"{APP_NAME}: Listener failed: {e}")
+        logger.error("Listener failed: %s", e)
 
 if __name__ == '__main__':
     listen_for_commands()
@@ -9,6 +9,7 @@ from consts import (
     QUEUE_FALCON_TO_SPEECH,
    QUEUE_FALCON_X_WING
 )
+from falcon_logging import setup_logging
 
 APP_NAME = "obi_wan.py"
 __version__ = "1.0"
@@ -17,10 +18,7 @@ load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-logging.basicConfig(
-    level=logging.INFO,
-    format=f'%(asctime)s | {APP_NAME} | %(levelname)s | %(message)s'
-)
+logger = logging.getLogger(APP_NAME)
 
 BANNER = r"""
 
@@ -36,7 +34,7 @@ BANNER = r"""
 
 def transcribe_audio(file_path):
     try:
-        logging.info(f"{APP_NAME}: Starting transcription: {file_path}")
+        logger.info("Starting transcription: %s", file_path)
         with open(file_path, "rb") as audio_file:
             result = client.audio.transcriptions.create(
                 model="whisper-1",
@@ -44,13 +42,13 @@ def transcribe_audio(file_path):
                 response_format="text",
                 language="pt"
             )
-        logging.info(f"{APP_NAME}: Transcription complete.")
+        logger.info("Transcription complete.")
         return result
     except Exception as e:
-        logging.error(f"{APP_NAME}: Transcription error: {e}")
+        logger.error("Transcription error: %s", e)
         return None
 
-def send_to_queue(queue_name, message):
+def send_to_queue(queue_name, message, correlation_id=None):
     try:
         params = pika.URLParameters(RABBITMQ_URI)
         connection = pika.BlockingConnection(params)
@@ -60,35 +58,40 @@ def send_to_queue(queue_name, message):
             exchange='',
             routing_key=queue_name,
             body=message.encode(),
-            properties=pika.BasicProperties(delivery_mode=2)
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                app_id=APP_NAME,
+                correlation_id=correlation_id
+            )
         )
         connection.close()
-        logging.info(f"{APP_NAME}: Message sent to queue '{queue_name}'")
+        logger.info("Message sent to queue '%s'", queue_name)
     except Exception as e:
-        logging.error(f"{APP_NAME}: Failed to send message to queue {queue_name}: {e}")
+        logger.error("Failed to send message to queue %s: %s", queue_name, e)
 
 def on_message(ch, method, properties, body):
     file_path = body.decode()
-    logging.info(f"{APP_NAME}: Received audio path: {file_path}")
+    logger.info("Received audio path: %s", file_path)
 
     if not os.path.exists(file_path):
-        logging.warning(f"{APP_NAME}: Audio file not found: {file_path}")
+        logger.warning("Audio file not found: %s", file_path)
         return
 
     transcription = transcribe_audio(file_path)
     if transcription:
-        print(f"\n🗣️ Transcription:\n{transcription}\n")
-        send_to_queue(QUEUE_FALCON_X_WING, transcription)
+        logger.info("Transcription ready", extra={"transcription": transcription})
+        send_to_queue(QUEUE_FALCON_X_WING, transcription, properties.correlation_id)
 
 def listen_for_commands():
+    setup_logging(APP_NAME)
     print(BANNER)
 
     if not RABBITMQ_URI:
-        logging.critical(f"{APP_NAME}: RABBITMQ_URI is not set.")
+        logger.critical("RABBITMQ_URI is not set.")
         return
 
-    logging.info(f"{APP_NAME}: Whisprr agent is online.")
-    logging.info(f"{APP_NAME}: Waiting for audio files to transcribe...")
+    logger.info("Whisprr agent is online.")
+    logger.info("Waiting for audio files to transcribe...")
 
     try:
         params = pika.URLParameters(RABBITMQ_URI)
@@ -102,7 +105,7 @@ def listen_for_commands():
         )
         channel.start_consuming()
     except Exception as e:
-        logging.error(f"{APP_NAME}: Listener failed: {e}")
+        logger.error("Listener failed: %s", e)
 
 if __name__ == '__main__':
     listen_for_commands()
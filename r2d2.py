@@ -0,0 +1,251 @@
+import argparse
+import base64
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+import pika
+
+from consts import (
+    RABBITMQ_URI,
+    QUEUE_FALCON_DESCRIBE,
+    QUEUE_FALCON_ASK,
+    QUEUE_FALCON_TO_SPEECH,
+    QUEUE_FALCON_X_WING,
+)
+from falcon_logging import setup_logging
+
+APP_NAME = "r2d2.py"
+__version__ = "1.0"
+
+logger = logging.getLogger(APP_NAME)
+
+BANNER = r"""
+
+,------.  ,---.      ,------.  ,---.
+|  .--. ''.-.  \     |  .-.  \'.-.  \
+|  '--'.' .-' .'     |  |  \  :.-' .'
+|  |\  \ /   '-.     |  '--'  /   '-.
+`--' '--''-----'     `-------''-----'
+
+🔵 Bip bup bip! (gravando e reproduzindo o tráfego da frota)
+"""
+
+# Firehose tracer: needs `rabbitmqctl trace_on` on the broker.
+TRACE_EXCHANGE = "amq.rabbitmq.trace"
+
+# Queues fed to the headless agents (c3po, obi_wan, yoda). Screen and audio
+# commands are left out since they would trigger a real screenshot/recording.
+REPLAY_QUEUES = [QUEUE_FALCON_DESCRIBE, QUEUE_FALCON_TO_SPEECH, QUEUE_FALCON_ASK]
+
+# Messages published by these agents are regenerated during a replay; r2d2's
+# own messages come from an earlier replay that ran while recording.
+DERIVED_APPS = {"c3po.py", "yoda.py", "obi_wan.py", APP_NAME}
+
+CHAINS = {
+    QUEUE_FALCON_DESCRIBE: "DESCRIBE -> c3po -> ASK -> yoda -> X_WING",
+    QUEUE_FALCON_TO_SPEECH: "TO_SPEECH -> obi_wan -> X_WING",
+    QUEUE_FALCON_ASK: "ASK -> yoda -> X_WING",
+}
+
+
+def _header(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def record(output_path, duration=None):
+    """Append every message published on the broker to `output_path` (JSON lines).
+
+    Bodies that point to an existing file (screenshots, audio) get the file
+    content embedded, so the capture can be replayed on another machine.
+    """
+    connection = pika.BlockingConnection(pika.URLParameters(RABBITMQ_URI))
+    channel = connection.channel()
+    trace_queue = channel.queue_declare(queue="", exclusive=True).method.queue
+    channel.queue_bind(queue=trace_queue, exchange=TRACE_EXCHANGE, routing_key="publish.#")
+
+    started = time.time()
+    count = 0
+    with open(output_path, "a", encoding="utf-8") as capture:
+        def on_trace(ch, method, properties, body):
+            nonlocal count
+            headers = properties.headers or {}
+            routing_keys = [_header(key) for key in headers.get("routing_keys", [])]
+            message_properties = headers.get("properties") or {}
+            text = body.decode(errors="replace")
+
+            entry = {
+                "ts": time.time(),
+                "queue": routing_keys[0] if routing_keys else "",
+                "app_id": _header(message_properties.get("app_id")),
+                "body": text,
+            }
+            if len(text) < 1024 and os.path.isfile(text):
+                with open(text, "rb") as payload:
+                    entry["payload"] = base64.b64encode(payload.read()).decode()
+                entry["payload_ext"] = os.path.splitext(text)[1]
+
+            capture.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            capture.flush()
+            count += 1
+            logger.info("Recorded message for queue '%s'", entry["queue"], extra={"body": text})
+
+        channel.basic_consume(queue=trace_queue, on_message_callback=on_trace, auto_ack=True)
+        logger.info("Recording broker traffic to %s (Ctrl+C to stop)", output_path)
+        try:
+            while duration is None or time.time() - started < duration:
+                connection.process_data_events(time_limit=1)
+        except KeyboardInterrupt:
+            pass
+
+    connection.close()
+    logger.info("Recorded %d messages", count)
+
+
+def load_capture(capture_path, queues):
+    """Read a capture keeping only external inputs to `queues`, with time offsets from the first one."""
+    entries = []
+    with open(capture_path, encoding="utf-8") as capture:
+        for line in capture:
+            entry = json.loads(line)
+            if entry["queue"] in queues and entry.get("app_id") not in DERIVED_APPS:
+                entries.append(entry)
+    if entries:
+        first = entries[0]["ts"]
+        for entry in entries:
+            entry["offset"] = entry["ts"] - first
+    return entries
+
+
+def _materialize(entry, payload_dir):
+    """Write an embedded payload to disk and return the body pointing to it."""
+    if "payload" not in entry:
+        return entry["body"]
+    path = os.path.join(payload_dir, f"{uuid.uuid4()}{entry['payload_ext']}")
+    with open(path, "wb") as payload:
+        payload.write(base64.b64decode(entry["payload"]))
+    return path
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def build_report(latencies, unanswered):
+    """Summarise latencies (queue -> seconds) and unanswered queues per chain."""
+    missing = {}
+    for queue in unanswered:
+        missing[queue] = missing.get(queue, 0) + 1
+
+    report = {}
+    for queue in sorted(set(latencies) | set(missing)):
+        values = latencies.get(queue, [])
+        report[CHAINS.get(queue, queue)] = {
+            "answered": len(values),
+            "missing": missing.get(queue, 0),
+            "p50": statistics.median(values) if values else None,
+            "p95": _percentile(values, 95) if values else None,
+            "max": max(values) if values else None,
+        }
+    return report
+
+
+def replay(capture_path, speed=1.0, queues=None, timeout=120.0):
+    """Publish a capture to the agents and time each chain until the answer reaches X_WING.
+
+    `speed` scales the recorded inter-arrival times (2.0 = twice as fast);
+    0 publishes everything as fast as possible. Answers are matched by the
+    correlation_id the agents copy from the message they consumed.
+    """
+    entries = load_capture(capture_path, queues or REPLAY_QUEUES)
+    if not entries:
+        logger.warning("Nothing to replay from %s", capture_path)
+        return {}
+
+    run_id = uuid.uuid4().hex[:8]
+    sent = {}
+    latencies = {}
+
+    # Payloads stay on disk until every pending answer arrived or timed out.
+    with tempfile.TemporaryDirectory(prefix="r2d2-") as payload_dir:
+        connection = pika.BlockingConnection(pika.URLParameters(RABBITMQ_URI))
+        channel = connection.channel()
+        for queue in {entry["queue"] for entry in entries} | {QUEUE_FALCON_X_WING}:
+            channel.queue_declare(queue=queue, durable=True)
+
+        def on_answer(ch, method, properties, body):
+            correlation_id = properties.correlation_id
+            if correlation_id in sent:
+                queue, published_at = sent.pop(correlation_id)
+                latencies.setdefault(queue, []).append(time.perf_counter() - published_at)
+
+        channel.basic_consume(queue=QUEUE_FALCON_X_WING, on_message_callback=on_answer, auto_ack=True)
+
+        logger.info("Replaying %d messages at %s", len(entries), f"{speed}x" if speed else "max speed")
+        started = time.perf_counter()
+        for index, entry in enumerate(entries):
+            if speed:
+                delay = started + entry["offset"] / speed - time.perf_counter()
+                if delay > 0:
+                    connection.process_data_events(time_limit=delay)
+
+            correlation_id = f"{run_id}-{index}"
+            channel.basic_publish(
+                exchange='',
+                routing_key=entry["queue"],
+                body=_materialize(entry, payload_dir).encode(),
+                properties=pika.BasicProperties(
+                    delivery_mode=2,
+                    app_id=APP_NAME,
+                    correlation_id=correlation_id
+                )
+            )
+            sent[correlation_id] = (entry["queue"], time.perf_counter())
+
+        deadline = time.perf_counter() + timeout
+        while sent and time.perf_counter() < deadline:
+            connection.process_data_events(time_limit=0.5)
+        connection.close()
+
+    return build_report(latencies, [queue for queue, _ in sent.values()])
+
+
+def print_report(report):
+    print(f"{'chain':<44} {'ok':>5} {'miss':>5} {'p50 s':>8} {'p95 s':>8} {'max s':>8}")
+    for chain, stats in report.items():
+        timings = [f"{stats[key]:>8.2f}" if stats[key] is not None else f"{'-':>8}"
+                   for key in ("p50", "p95", "max")]
+        print(f"{chain:<44} {stats['answered']:>5} {stats['missing']:>5} {' '.join(timings)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay Falcon message traffic.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_cmd = commands.add_parser("record", help="capture broker traffic to a file")
+    record_cmd.add_argument("output")
+    record_cmd.add_argument("--duration", type=float, help="seconds to record (default: until Ctrl+C)")
+
+    replay_cmd = commands.add_parser("replay", help="replay a capture and report latencies")
+    replay_cmd.add_argument("capture")
+    replay_cmd.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N times faster, 0 = max")
+    replay_cmd.add_argument("--queues", nargs="+", default=REPLAY_QUEUES)
+    replay_cmd.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for pending answers")
+
+    args = parser.parse_args()
+    setup_logging(APP_NAME)
+    print(BANNER)
+
+    if args.command == "record":
+        record(args.output, args.duration)
+    else:
+        print_report(replay(args.capture, args.speed, args.queues, args.timeout))
+
+
+if __name__ == '__main__':
+    main()
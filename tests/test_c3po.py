@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+import c3po
+
+
+def _tesseract_data(words):
+    """Build an image_to_data() dict from (block, line, left, top, text) tuples, 10 px per char."""
+    keys = ["block_num", "par_num", "line_num", "left", "top", "width", "conf", "text"]
+    data = {key: [] for key in keys}
+    for block, line, left, top, text in words:
+        for key, value in zip(keys, (block, 1, line, left, top, len(text) * 10, 95, text)):
+            data[key].append(value)
+    return data
+
+
+@pytest.fixture
+def screenshot(tmp_path):
+    path = tmp_path / "shot.png"
+    Image.new("RGB", (1300, 400), "white").save(path)
+    return str(path)
+
+
+def _fake_tesseract(monkeypatch, words):
+    monkeypatch.setattr(c3po, "pytesseract", SimpleNamespace(
+        Output=SimpleNamespace(DICT="dict"),
+        image_to_data=lambda image, lang, output_type: _tesseract_data(words),
+    ))
+
+
+def test_extract_text_keeps_columns_apart_under_full_width_title(monkeypatch, screenshot):
+    _fake_tesseract(monkeypatch, [
+        # Title spanning both panes.
+        (1, 1, 10, 10, "1."), (1, 1, 40, 10, "Two"), (1, 1, 90, 10, "Sum"), (1, 1, 1200, 10, "Run"),
+        # Problem text on the left.
+        (2, 1, 20, 60, "Given"), (2, 1, 80, 60, "nums"),
+        (2, 2, 20, 90, "return"), (2, 2, 90, 90, "indices"),
+        # Editor on the right, split by tesseract into two blocks.
+        (3, 1, 700, 60, "def"), (3, 1, 740, 60, "f():"),
+        (3, 2, 740, 90, "x"), (3, 2, 760, 90, "="), (3, 2, 780, 90, "1"),
+        (4, 1, 740, 120, "return"), (4, 1, 810, 120, "x"),
+    ])
+
+    text, confidence, words = c3po.extract_text(screenshot)
+
+    assert text.split("\n\n") == [
+        "1. Two Sum Run",
+        "Given nums\nreturn indices",
+        "def f():\n    x = 1",
+        "    return x",
+    ]
+    assert confidence == 95
+    assert words == 15
+
+
+def test_extract_text_without_tesseract_returns_none(monkeypatch, screenshot):
+    monkeypatch.setattr(c3po, "pytesseract", None)
+
+    assert c3po.extract_text(screenshot) is None
@@ -0,0 +1,55 @@
+import base64
+import json
+import os
+
+import r2d2
+from consts import QUEUE_FALCON_ASK, QUEUE_FALCON_DESCRIBE, QUEUE_FALCON_SCREEN, QUEUE_FALCON_TO_SPEECH
+
+
+def _write_capture(tmp_path, entries):
+    path = tmp_path / "capture.jsonl"
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+    return str(path)
+
+
+def test_load_capture_keeps_only_external_inputs(tmp_path):
+    capture = _write_capture(tmp_path, [
+        {"ts": 100.0, "queue": QUEUE_FALCON_SCREEN, "app_id": None, "body": "PRINT_SCREEN"},
+        {"ts": 100.5, "queue": QUEUE_FALCON_DESCRIBE, "app_id": None, "body": "/tmp/a.png",
+         "payload": base64.b64encode(b"png").decode(), "payload_ext": ".png"},
+        {"ts": 103.0, "queue": QUEUE_FALCON_ASK, "app_id": "c3po.py", "body": "a description"},
+        {"ts": 104.0, "queue": QUEUE_FALCON_ASK, "app_id": None, "body": "What is a heap?"},
+        {"ts": 105.0, "queue": QUEUE_FALCON_ASK, "app_id": "r2d2.py", "body": "replayed"},
+    ])
+
+    entries = r2d2.load_capture(capture, r2d2.REPLAY_QUEUES)
+
+    assert [entry["body"] for entry in entries] == ["/tmp/a.png", "What is a heap?"]
+    assert [entry["offset"] for entry in entries] == [0.0, 3.5]
+
+
+def test_materialize_writes_embedded_payload(tmp_path):
+    entry = {"body": "/gone/a.mp3", "payload": base64.b64encode(b"mp3").decode(), "payload_ext": ".mp3"}
+
+    path = r2d2._materialize(entry, str(tmp_path))
+
+    assert os.path.dirname(path) == str(tmp_path) and path.endswith(".mp3")
+    with open(path, "rb") as payload:
+        assert payload.read() == b"mp3"
+    assert r2d2._materialize({"body": "hello"}, str(tmp_path)) == "hello"
+
+
+def test_build_and_print_report(capsys):
+    latencies = {QUEUE_FALCON_ASK: [float(n) for n in range(1, 21)]}
+
+    report = r2d2.build_report(latencies, [QUEUE_FALCON_ASK, QUEUE_FALCON_TO_SPEECH])
+
+    assert report[r2d2.CHAINS[QUEUE_FALCON_ASK]] == {
+        "answered": 20, "missing": 1, "p50": 10.5, "p95": 20.0, "max": 20.0,
+    }
+    assert report[r2d2.CHAINS[QUEUE_FALCON_TO_SPEECH]]["answered"] == 0
+
+    r2d2.print_report(report)
+    output = capsys.readouterr().out.splitlines()
+    assert output[1].split()[-5:] == ["20", "1", "10.50", "20.00", "20.00"]
+    assert output[2].split()[-5:] == ["0", "1", "-", "-", "-"]
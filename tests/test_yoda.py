@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+import yoda
+
+
+@pytest.fixture
+def policy_file(tmp_path, monkeypatch):
+    def write(policy):
+        path = tmp_path / "policy.json"
+        path.write_text(json.dumps(policy), encoding="utf-8")
+        monkeypatch.setenv("FALCON_YODA_POLICY", str(path))
+    return write
+
+
+def test_custom_tiers_do_not_inherit_default_tier_references(policy_file):
+    policy_file({
+        "tiers": {"mini": {"model": "gpt-4o-mini", "max_tokens": 300},
+                  "big": {"model": "gpt-4o", "max_tokens": 800}},
+        "default": "big",
+        "rules": [{"tier": "mini", "max_chars": 300}],
+        "escalate_to": "big",
+    })
+
+    policy = yoda.load_policy()
+
+    assert policy is not yoda.DEFAULT_POLICY
+    assert policy["hints"] == {}
+    assert policy["escalate_patterns"] == yoda.DEFAULT_POLICY["escalate_patterns"]
+
+
+@pytest.mark.parametrize("policy", [
+    {"hints": ["#x"]},
+    {"rules": ["small"]},
+    {"escalate_patterns": "I'm not sure"},
+    {"tiers": {"small": {"model": "gpt-4o-mini", "max_tokens": "400"}}, "default": "small"},
+    {"tiers": {"mini": {"model": "gpt-4o-mini", "max_tokens": 300}}, "default": "big"},
+    ["not", "an", "object"],
+])
+def test_invalid_policy_falls_back_to_default(policy_file, policy):
+    policy_file(policy)
+
+    assert yoda.load_policy() is yoda.DEFAULT_POLICY
+
+
+@pytest.mark.parametrize("prompt, tier", [
+    ("Explain why; then stop;", "small"),
+    ("What is a heap?", "small"),
+    ("int x = 1;\nwhy does this not compile?", "large"),
+    ("def f():\n    return 1", "large"),
+    ("Solve two sum", "large"),
+])
+def test_route_by_features(prompt, tier):
+    assert yoda.route(prompt)[0] == tier
+
+
+def test_route_hints_are_whole_tokens():
+    assert yoda.route("How do I use #fastapi routers?")[:2] == ("small", "How do I use #fastapi routers?")
+    assert yoda.route("#deep what is a heap?")[:2] == ("large", "what is a heap?")
+    assert yoda.route("#fast")[:2] == ("small", "#fast")
+
+
+def test_needs_escalation_only_on_opening_refusal():
+    assert not yoda.needs_escalation("I cannot stress enough how simple this is.", "stop")
+    assert yoda.needs_escalation("I'm not sure, but maybe.", "stop")
+    assert yoda.needs_escalation("Partial answer", "length")
+
+
+def test_failed_escalation_keeps_small_answer(monkeypatch):
+    def complete(prompt, tier):
+        if tier == "large":
+            raise TimeoutError("timed out")
+        return "I'm not sure, maybe a heap.", "stop"
+
+    monkeypatch.setattr(yoda, "_complete", complete)
+
+    assert yoda.process_text_with_gpt("What is a heap?") == "I'm not sure, maybe a heap."
@@ -1,11 +1,18 @@
+import json
 import logging
 import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter, deque
 
 import pika
 from dotenv import load_dotenv
 from openai import OpenAI
 
 from consts import RABBITMQ_URI, QUEUE_FALCON_ASK, QUEUE_FALCON_X_WING
+from falcon_logging import setup_logging
 
 APP_NAME = "yoda.py"
 __version__ = "1.0"
@@ -14,10 +21,7 @@ load_dotenv()
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-logging.basicConfig(
-    level=logging.INFO,
-    format=f'%(asctime)s | {APP_NAME} | %(levelname)s | %(message)s'
-)
+logger = logging.getLogger(APP_NAME)
 
 BANNER = r"""
 
@@ -31,23 +35,279 @@ BANNER = r"""
 """
 
 
+# === Model tiering ===
+# Rules are checked in order and the first match picks the tier. A rule may
+# set `max_chars`, `min_chars`, `code` (true/false) and `question` (list of
+# types: "solve", "explain", "short"). Hints in the message override the rules
+# (as whole tokens) and are stripped before the prompt is sent. Override the
+# policy with a JSON file in FALCON_YODA_POLICY; a small-tier answer that
+# starts with one of `escalate_patterns` is retried on `escalate_to`.
+DEFAULT_POLICY = {
+    "tiers": {
+        "small": {"model": "gpt-4o-mini", "max_tokens": 400},
+        "large": {"model": "gpt-4o", "max_tokens": 800},
+    },
+    "default": "large",
+    "rules": [
+        {"tier": "large", "code": True},
+        {"tier": "large", "question": ["solve"]},
+        {"tier": "small", "max_chars": 400},
+    ],
+    "hints": {"#fast": "small", "#deep": "large"},
+    "escalate_to": "large",
+    "escalate_patterns": [
+        "I'm not sure", "I am not sure", "I'm sorry", "I cannot help", "I can't help",
+        "Não sei", "Não tenho certeza", "Desculpe",
+    ],
+}
+
+STATS_EVERY = 50
+
+# Pre-router behaviour, used as the baseline by --benchmark.
+BASELINE_TIER = {"model": "gpt-4o", "max_tokens": 800}
+
+BENCHMARK_PROMPTS = [
+    "What is a hash map?",
+    "What does O(n log n) mean?",
+    "Qual a diferença entre lista e tupla em Python?",
+    "Is a Python dict ordered?",
+    "What is a stable sort?",
+    "Explain the difference between BFS and DFS.",
+    "Solve LeetCode 1. Two Sum: given nums and target, return the indices of the two numbers adding up to target.",
+    "Implement an LRU cache with O(1) get and put.",
+    "def two_sum(nums, target):\n    for i in range(len(nums)):\n        for j in range(i + 1, len(nums)):\n"
+    "            if nums[i] + nums[j] == target:\n                return [i, j]\nHow can I make this faster?",
+    "Write a function that checks whether a binary tree is balanced and give its complexity.",
+]
+
+# A trailing `;`, `{` or `}` only counts on a line that also looks like code
+# (an assignment, a call or an index), so prose such as "why; then stop;" does not.
+CODE_PATTERN = re.compile(
+    r"```|^\s*(def |class |function |public |import |#include|for\s*\(|while\s*\()"
+    r"|^[^\n]*[=(\[][^\n]*[;{}]\s*$|^\s*[{}]\s*$",
+    re.MULTILINE
+)
+SOLVE_PATTERN = re.compile(
+    r"\b(implement|write|solve|algorithm|leetcode|complexity|optimi[sz]e|"
+    r"implemente|escreva|resolva|algoritmo|complexidade)\b",
+    re.IGNORECASE
+)
+EXPLAIN_PATTERN = re.compile(r"\b(explain|why|how does|explique|por que|porque|como funciona)\b", re.IGNORECASE)
+
+
+# Keys naming tiers; a policy file with its own `tiers` does not inherit them.
+TIER_REFERENCES = ("default", "escalate_to", "hints", "rules")
+
+
+def _is_str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def validate_policy(policy: dict) -> list[str]:
+    """Return the problems that would make routing fail at message time."""
+    tiers = policy.get("tiers")
+    if not isinstance(tiers, dict) or not tiers:
+        return ["'tiers' must be a non-empty object"]
+    problems = [f"tier '{name}' needs a 'model' string and an integer 'max_tokens'"
+                for name, settings in tiers.items()
+                if not isinstance(settings, dict) or not isinstance(settings.get("model"), str)
+                or not isinstance(settings.get("max_tokens"), int) or isinstance(settings["max_tokens"], bool)]
+
+    hints, rules = policy.get("hints"), policy.get("rules")
+    if not isinstance(hints, dict) or not all(isinstance(hint, str) and hint for hint in hints):
+        problems.append("'hints' must map non-empty strings to tiers")
+        hints = {}
+    if not isinstance(rules, list) or not all(isinstance(rule, dict) for rule in rules):
+        problems.append("'rules' must be a list of objects")
+        rules = []
+    if not _is_str_list(policy.get("escalate_patterns")):
+        problems.append("'escalate_patterns' must be a list of strings")
+    for index, rule in enumerate(rules):
+        for key in ("max_chars", "min_chars"):
+            if key in rule and (not isinstance(rule[key], int) or isinstance(rule[key], bool)):
+                problems.append(f"rules[{index}].{key} must be an integer")
+        if "code" in rule and not isinstance(rule["code"], bool):
+            problems.append(f"rules[{index}].code must be true or false")
+        if "question" in rule and not _is_str_list(rule["question"]):
+            problems.append(f"rules[{index}].question must be a list of strings")
+
+    targets = [("default", policy.get("default"))]
+    if policy.get("escalate_to"):
+        targets.append(("escalate_to", policy["escalate_to"]))
+    targets += [(f"hint '{hint}'", tier) for hint, tier in hints.items()]
+    targets += [(f"rules[{index}]", rule.get("tier")) for index, rule in enumerate(rules)]
+    problems += [f"{where} points to unknown tier '{tier}'"
+                 for where, tier in targets if not isinstance(tier, str) or tier not in tiers]
+    return problems
+
+
+def load_policy() -> dict:
+    policy_path = os.getenv("FALCON_YODA_POLICY")
+    if not policy_path:
+        return DEFAULT_POLICY
+    try:
+        with open(policy_path, encoding="utf-8") as policy_file:
+            custom = json.load(policy_file)
+        if not isinstance(custom, dict):
+            raise ValueError("the policy must be a JSON object")
+
+        base = DEFAULT_POLICY
+        if "tiers" in custom:
+            # Own tiers: default hints/rules/escalation would point to tiers that may not exist.
+            base = {key: value for key, value in DEFAULT_POLICY.items() if key not in TIER_REFERENCES}
+            base.update(hints={}, rules=[])
+        policy = {**base, **custom}
+        problems = validate_policy(policy)
+    except Exception as e:
+        problems = [str(e)]
+
+    if problems:
+        logger.error("Invalid routing policy '%s', using default: %s", policy_path, "; ".join(problems))
+        return DEFAULT_POLICY
+    return policy
+
+
+POLICY = load_policy()
+
+HINT_PATTERNS = {hint: re.compile(rf"(?<!\S){re.escape(hint)}(?!\S)") for hint in POLICY["hints"]}
+
+tier_latencies = {tier: deque(maxlen=500) for tier in POLICY["tiers"]}
+route_counts = Counter()
+
+
+def prompt_features(prompt: str) -> dict:
+    if SOLVE_PATTERN.search(prompt):
+        question = "solve"
+    elif EXPLAIN_PATTERN.search(prompt):
+        question = "explain"
+    else:
+        question = "short"
+    return {
+        "chars": len(prompt),
+        "code": bool(CODE_PATTERN.search(prompt)),
+        "question": question,
+    }
+
+
+def _rule_matches(rule: dict, features: dict) -> bool:
+    if "max_chars" in rule and features["chars"] > rule["max_chars"]:
+        return False
+    if "min_chars" in rule and features["chars"] < rule["min_chars"]:
+        return False
+    if "code" in rule and features["code"] != rule["code"]:
+        return False
+    if "question" in rule and features["question"] not in rule["question"]:
+        return False
+    return True
+
+
+def route(prompt: str) -> tuple[str, str, str, dict]:
+    """Pick a tier for the prompt. Returns (tier, prompt without hints, reason, features)."""
+    for hint, tier in POLICY["hints"].items():
+        if HINT_PATTERNS[hint].search(prompt):
+            # A message made only of a hint keeps its text rather than becoming empty.
+            clean = HINT_PATTERNS[hint].sub("", prompt).strip() or prompt
+            return tier, clean, f"hint {hint}", prompt_features(clean)
+
+    features = prompt_features(prompt)
+    for index, rule in enumerate(POLICY["rules"]):
+        if _rule_matches(rule, features):
+            return rule["tier"], prompt, f"rule {index}", features
+    return POLICY["default"], prompt, "default", features
+
+
+def needs_escalation(answer: str | None, finish_reason: str | None) -> bool:
+    """Cheap check on a small-tier answer: empty, cut by the token limit, or opening with a refusal."""
+    if not answer or not answer.strip() or finish_reason == "length":
+        return True
+    opening = answer.lstrip().lower()
+    return any(opening.startswith(pattern.lower()) for pattern in POLICY["escalate_patterns"])
+
+
+def _complete(prompt: str, tier: str) -> tuple[str | None, str | None]:
+    settings = POLICY["tiers"][tier]
+    start = time.perf_counter()
+    response = client.chat.completions.create(
+        model=settings["model"],
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=settings["max_tokens"]
+    )
+    tier_latencies.setdefault(tier, deque(maxlen=500)).append(time.perf_counter() - start)
+    choice = response.choices[0]
+    return choice.message.content, choice.finish_reason
+
+
+def _log_stats():
+    summary = {
+        tier: {"count": len(values), "p50_ms": round(statistics.median(values) * 1000)}
+        for tier, values in tier_latencies.items() if values
+    }
+    logger.info("Routing stats", extra={"routes": dict(route_counts), "tiers": summary})
+
+
 def process_text_with_gpt(prompt: str) -> str | None:
     try:
-        logging.info(f"{APP_NAME}: Sending prompt to OpenAI GPT model...")
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=800
-        )
-        answer = response.choices[0].message.content
-        logging.info(f"{APP_NAME}: Response received from GPT.")
+        tier, prompt, reason, features = route(prompt)
+        logger.info("Sending prompt to OpenAI GPT model...", extra={"tier": tier, "reason": reason, **features})
+        start = time.perf_counter()
+        answer, finish_reason = _complete(prompt, tier)
+
+        escalate_to = POLICY.get("escalate_to")
+        escalated = bool(escalate_to) and tier != escalate_to and needs_escalation(answer, finish_reason)
+        if escalated:
+            logger.info("Escalating from '%s' to '%s'", tier, escalate_to)
+            try:
+                answer, finish_reason = _complete(prompt, escalate_to)
+            except Exception as e:
+                # Keep the small-tier answer rather than dropping the message.
+                logger.warning("Escalation to '%s' failed, keeping '%s' answer: %s", escalate_to, tier, e)
+                escalated = False
+
+        route_counts[f"{tier}->{escalate_to}" if escalated else tier] += 1
+        logger.info("Response received from GPT.", extra={
+            "tier": escalate_to if escalated else tier,
+            "escalated": escalated,
+            "latency_ms": round((time.perf_counter() - start) * 1000),
+        })
+        if sum(route_counts.values()) % STATS_EVERY == 0:
+            _log_stats()
         return answer
     except Exception as e:
-        logging.error(f"{APP_NAME}: Failed to process text with GPT: {e}")
+        logger.error("Failed to process text with GPT: %s", e)
         return None
 
 
-def send_to_queue(queue_name: str, message: str):
+def benchmark(prompts: list[str]) -> None:
+    """Time each prompt on the single-tier baseline and through the router; print p50 per tier."""
+    results = {}
+    for prompt in prompts:
+        tier = route(prompt)[0]
+        try:
+            start = time.perf_counter()
+            client.chat.completions.create(
+                model=BASELINE_TIER["model"],
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=BASELINE_TIER["max_tokens"]
+            )
+            baseline = time.perf_counter() - start
+
+            start = time.perf_counter()
+            if process_text_with_gpt(prompt) is None:
+                raise RuntimeError("router returned no answer")
+            routed = time.perf_counter() - start
+        except Exception as e:
+            logger.error("Benchmark prompt failed: %s", e)
+            continue
+        results.setdefault(tier, []).append((baseline, routed))
+
+    print(f"{'tier':<10} {'n':>3} {'baseline p50 s':>15} {'router p50 s':>13}")
+    for tier, timings in sorted(results.items()):
+        print(f"{tier:<10} {len(timings):>3} {statistics.median(b for b, _ in timings):>15.2f} "
+              f"{statistics.median(r for _, r in timings):>13.2f}")
+    print(f"escalations: {sum(count for key, count in route_counts.items() if '->' in key)}")
+
+
+def send_to_queue(queue_name: str, message: str, correlation_id: str | None = None):
     try:
         params = pika.URLParameters(RABBITMQ_URI)
         connection = pika.BlockingConnection(params)
@@ -57,31 +317,36 @@ def send_to_queue(queue_name: str, message: str):
             exchange='',
             routing_key=queue_name,
             body=message.encode(),
-            properties=pika.BasicProperties(delivery_mode=2)
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                app_id=APP_NAME,
+                correlation_id=correlation_id
+            )
         )
         connection.close()
-        logging.info(f"{APP_NAME}: Message sent to queue '{queue_name}'")
+        logger.info("Message sent to queue '%s'", queue_name)
     except Exception as e:
-        logging.error(f"{APP_NAME}: Failed to send message to queue '{queue_name}': {e}")
+        logger.error("Failed to send message to queue '%s': %s", queue_name, e)
 
 
 def on_message(ch, method, properties, body):
     prompt = body.decode()
-    logging.info(f"{APP_NAME}: Received prompt: {prompt}")
+    logger.info("Received prompt", extra={"prompt": prompt})
     result = process_text_with_gpt(prompt)
     if result:
-        send_to_queue(QUEUE_FALCON_X_WING, result)
+        send_to_queue(QUEUE_FALCON_X_WING, result, properties.correlation_id)
 
 
 def listen_for_commands():
+    setup_logging(APP_NAME)
     print(BANNER)
 
     if not RABBITMQ_URI:
-        logging.critical(f"{APP_NAME}: Missing RabbitMQ URI in environment.")
+        logger.critical("Missing RabbitMQ URI in environment.")
         return
 
-    logging.info(f"{APP_NAME}: Agent is online.")
-    logging.info(f"{APP_NAME}: Listening for prompts on queue '{QUEUE_FALCON_ASK}'...")
+    logger.info("Agent is online.")
+    logger.info("Listening for prompts on queue '%s'...", QUEUE_FALCON_ASK)
 
     try:
         params = pika.URLParameters(RABBITMQ_URI)
@@ -95,8 +360,12 @@ def listen_for_commands():
         )
         channel.start_consuming()
     except Exception as e:
-        logging.error(f"{APP_NAME}: Listener failed: {e}")
+        logger.error("Listener failed: %s", e)
 
 
 if __name__ == '__main__':
-    listen_for_commands()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        setup_logging(APP_NAME)
+        benchmark(BENCHMARK_PROMPTS)
+    else:
+        listen_for_commands()
\ No newline at end of file